@@ -0,0 +1,154 @@
+"""Concurrency stress test for cache expiry in the YNAB service.
+
+Expires every widget cache, then fires many concurrent requests at the
+widget endpoints and counts upstream YNAB calls. With request coalescing
+each expiry must cause exactly one fetch of transactions, categories and
+accounts, no matter how many requests arrive during the refresh. The YNAB
+client is replaced with an in-memory fake that sleeps to simulate latency.
+
+Usage:
+    python benchmarks/bench_concurrency.py [--threads 50] [--rounds 5] [--latency 0.2]
+
+Prints one JSON object per round and exits non-zero if any round made more
+than one upstream fetch per endpoint or any request failed.
+"""
+import argparse
+import collections
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = ['/spending-trends', '/monthly-goals', '/savings-rate', '/net-worth']
+
+os.environ.update({
+    'YNAB_API_TOKEN': 'benchmark',
+    'YNAB_BUDGET_ID': 'budget',
+    'YNAB_MONTHLY_CATEGORIES': 'Groceries,Rent',
+    'YNAB_MONTHLY_INCOME': '6500',
+    'YNAB_SAVINGS_ACCOUNTS': 'Savings',
+})
+sys.path.insert(0, REPO_ROOT)
+import ynab_service  # noqa: E402
+
+upstream_calls = collections.Counter()
+upstream_lock = threading.Lock()
+
+
+def upstream(name, latency, response):
+    with upstream_lock:
+        upstream_calls[name] += 1
+    time.sleep(latency)
+    return response
+
+
+def make_fake_ynab(latency):
+    today = datetime.now().date()
+    categories = [
+        SimpleNamespace(id='groceries', name='Groceries', budgeted=400000, balance=100000),
+        SimpleNamespace(id='rent', name='Rent', budgeted=1500000, balance=0),
+    ]
+    category_groups = [SimpleNamespace(name='Living', categories=categories)]
+    accounts = [
+        SimpleNamespace(id='checking', name='Checking', type='checking',
+                        balance=2500000, closed=False, on_budget=True),
+        SimpleNamespace(id='savings', name='Savings', type='savings',
+                        balance=10000000, closed=False, on_budget=True),
+    ]
+    transactions = [
+        SimpleNamespace(id=f'tx-{i}', date=(today - timedelta(days=i % 40)).isoformat(),
+                        amount=-(i + 1) * 1000, account_id='checking',
+                        category_id=categories[i % 2].id, category_name=categories[i % 2].name,
+                        payee_name='Store', transfer_account_id=None, subtransactions=[], deleted=False)
+        for i in range(500)
+    ]
+
+    def transactions_data():
+        return SimpleNamespace(data=SimpleNamespace(transactions=transactions, server_knowledge=1))
+
+    class FakeClient:
+        def get(self, endpoint):
+            return upstream('transactions', latency,
+                            {'data': {'transactions': [], 'server_knowledge': 1}})
+
+    class FakeYNAB:
+        def __init__(self, api_token=None, client=None):
+            self.client = FakeClient()
+            self.transactions = SimpleNamespace(
+                get_transactions=lambda budget_id: upstream('transactions', latency, transactions_data()))
+            self.categories = SimpleNamespace(
+                get_categories=lambda budget_id: upstream('categories', latency, SimpleNamespace(
+                    data=SimpleNamespace(category_groups=category_groups))))
+            self.accounts = SimpleNamespace(
+                get_accounts=lambda budget_id: upstream('accounts', latency, SimpleNamespace(
+                    data=SimpleNamespace(accounts=accounts))))
+
+    return FakeYNAB
+
+
+def expire_caches():
+    with ynab_service.store_lock:
+        for widget in ynab_service.WIDGETS.values():
+            widget['cache']['timestamp'] = 0
+        ynab_service.store['synced_at'] = 0
+
+
+def run_round(n_threads):
+    barrier = threading.Barrier(n_threads)
+    statuses = collections.Counter()
+    statuses_lock = threading.Lock()
+
+    def worker(index):
+        client = ynab_service.app.test_client()
+        barrier.wait()
+        status = client.get(ENDPOINTS[index % len(ENDPOINTS)]).status_code
+        with statuses_lock:
+            statuses[status] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.2,
+                        help='Simulated seconds per upstream call')
+    args = parser.parse_args()
+
+    ynab_service.YNAB = make_fake_ynab(args.latency)
+
+    failed = False
+    for round_number in range(1, args.rounds + 1):
+        expire_caches()
+        upstream_calls.clear()
+        statuses, elapsed = run_round(args.threads)
+
+        ok = (statuses == {200: args.threads}
+              and all(upstream_calls[name] == 1 for name in ('transactions', 'categories', 'accounts')))
+        failed = failed or not ok
+        print(json.dumps({
+            'round': round_number,
+            'threads': args.threads,
+            'upstream_calls': dict(upstream_calls),
+            'statuses': {str(status): count for status, count in statuses.items()},
+            'elapsed_ms': round(elapsed * 1000, 2),
+            'ok': ok,
+        }))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
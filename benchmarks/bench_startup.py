@@ -0,0 +1,152 @@
+"""Startup benchmark for the YNAB service.
+
+Measures module import time and first-request latency for each widget
+endpoint in fresh interpreter processes. The YNAB client is replaced with
+an in-memory fake so the numbers reflect the service itself, not the network.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--transactions 5000]
+
+Prints one JSON object per run so results can be appended to a log and tracked.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = ['/spending-trends', '/monthly-goals', '/savings-rate', '/net-worth', '/top-payees']
+
+# Runs inside a fresh interpreter so the import is measured cold
+CHILD_SCRIPT = r'''
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+start = time.perf_counter()
+import ynab_service
+import_seconds = time.perf_counter() - start
+
+n_transactions = int(sys.argv[1])
+endpoints = sys.argv[2:]
+
+today = datetime.now().date()
+categories = [
+    SimpleNamespace(id=f"cat-{i}", name=f"Category {i}", budgeted=250000,
+                    balance=50000, goal_target=None)
+    for i in range(20)
+]
+category_groups = [
+    SimpleNamespace(name=f"Group {g}", categories=categories[g * 4:(g + 1) * 4])
+    for g in range(5)
+]
+accounts = [
+    SimpleNamespace(id="acc-checking", name="Checking", type="checking",
+                    balance=2500000, closed=False, on_budget=True),
+    SimpleNamespace(id="acc-savings", name="Savings", type="savings",
+                    balance=10000000, closed=False, on_budget=True),
+    SimpleNamespace(id="acc-card", name="Card", type="creditCard",
+                    balance=-750000, closed=False, on_budget=True),
+]
+transactions = []
+for i in range(n_transactions):
+    category = categories[i % len(categories)]
+    transactions.append(SimpleNamespace(
+        id=f"tx-{i}",
+        date=(today - timedelta(days=i % 365)).isoformat(),
+        amount=-((i % 97) + 1) * 1000 if i % 10 else 500000,
+        account_id="acc-savings" if i % 10 == 0 else "acc-checking",
+        category_id=category.id,
+        category_name=category.name,
+        payee_name=f"Payee {i % 50}",
+        transfer_account_id=None,
+        subtransactions=[],
+        deleted=False,
+    ))
+
+
+class FakeYNAB:
+    def __init__(self, api_token=None, client=None):
+        budget = SimpleNamespace(id="budget")
+        self.budgets = SimpleNamespace(
+            get_budget=lambda budget_id: SimpleNamespace(data=SimpleNamespace(budget=budget)),
+            get_budgets=lambda: SimpleNamespace(data=SimpleNamespace(budgets=[budget])),
+        )
+        self.transactions = SimpleNamespace(
+            get_transactions=lambda budget_id: SimpleNamespace(
+                data=SimpleNamespace(transactions=transactions, server_knowledge=1)))
+        self.categories = SimpleNamespace(
+            get_categories=lambda budget_id: SimpleNamespace(
+                data=SimpleNamespace(category_groups=category_groups)))
+        self.accounts = SimpleNamespace(
+            get_accounts=lambda budget_id: SimpleNamespace(
+                data=SimpleNamespace(accounts=accounts)))
+
+
+ynab_service.YNAB = FakeYNAB
+client = ynab_service.app.test_client()
+
+first_request_ms = {}
+for endpoint in endpoints:
+    start = time.perf_counter()
+    response = client.get(endpoint)
+    first_request_ms[endpoint] = round((time.perf_counter() - start) * 1000, 2)
+    if response.status_code != 200:
+        raise SystemExit(f"{endpoint} returned {response.status_code}: {response.get_data(as_text=True)}")
+
+print(json.dumps({
+    'import_ms': round(import_seconds * 1000, 2),
+    'pandas_loaded': 'pandas' in sys.modules,
+    'first_request_ms': first_request_ms,
+}))
+'''
+
+
+def run_once(n_transactions):
+    env = dict(os.environ)
+    env.update({
+        'YNAB_API_TOKEN': 'benchmark',
+        'YNAB_BUDGET_ID': 'budget',
+        'YNAB_MONTHLY_CATEGORIES': 'Category 0,Category 1,Category 2',
+        'YNAB_MONTHLY_INCOME': '6500',
+        'YNAB_SAVINGS_ACCOUNTS': 'Savings',
+        'PYTHONDONTWRITEBYTECODE': '1',
+    })
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT, str(n_transactions), *ENDPOINTS],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--transactions', type=int, default=5000)
+    args = parser.parse_args()
+
+    results = []
+    for _ in range(args.runs):
+        result = run_once(args.transactions)
+        results.append(result)
+        print(json.dumps(result))
+
+    summary = {
+        'runs': args.runs,
+        'transactions': args.transactions,
+        'import_ms_median': round(statistics.median(r['import_ms'] for r in results), 2),
+        'first_request_ms_median': {
+            endpoint: round(statistics.median(r['first_request_ms'][endpoint] for r in results), 2)
+            for endpoint in ENDPOINTS
+        },
+    }
+    print(json.dumps({'summary': summary}))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,19 @@
-from flask import Flask, jsonify, request
-import pandas as pd
+from flask import Flask, Response, jsonify, request
+import csv
+import heapq
+import importlib.util
+import io
+import json
+import math
 import os
-from datetime import datetime, timedelta
+import threading
+from datetime import date, datetime, timedelta
 from dotenv import load_dotenv
+import requests
 from ynab_sdk import YNAB
+from ynab_sdk.api.models.responses.transactions import TransactionsResponse
+from ynab_sdk.utils.clients.default_client import DefaultClient
+from ynab_sdk.utils.configurations.default import DefaultConfig
 import time
 
 # Load environment variables
@@ -15,535 +25,1475 @@ app = Flask(__name__)
 cache = {
     'data': None,
     'timestamp': 0,
-    'ttl': 900  # 15 minutes in seconds
+    'ttl': 900,  # 15 minutes in seconds
+    'dirty': True,  # Set when a sync changes data this widget depends on
+    'window': None  # Window the cached data was computed for
 }
 
 # Cache for monthly goals data
 monthly_cache = {
     'data': None,
     'timestamp': 0,
-    'ttl': 900  # 15 minutes in seconds
+    'ttl': 900,  # 15 minutes in seconds
+    'dirty': True,
+    'window': None
 }
 
 # Cache for savings rate data
 savings_cache = {
     'data': None,
     'timestamp': 0,
-    'ttl': 900  # 15 minutes in seconds
+    'ttl': 900,  # 15 minutes in seconds
+    'dirty': True,
+    'window': None
 }
 
 # Cache for net worth data
 net_worth_cache = {
     'data': None,
     'timestamp': 0,
-    'ttl': 900  # 15 minutes in seconds
+    'ttl': 900,  # 15 minutes in seconds
+    'dirty': True,
+    'window': None
 }
 
-def get_ynab_spending_data():
-    """Get top 5 spending categories from last 30 days"""
-    
-    # Check cache first
+# Cache for top payees data
+payees_cache = {
+    'data': None,
+    'timestamp': 0,
+    'ttl': 900,  # 15 minutes in seconds
+    'dirty': True,
+    'window': None
+}
+
+# Local copy of the budget, kept current with YNAB delta requests
+store = {
+    'budget_id': None,
+    'server_knowledge': None,  # Transactions delta cursor from YNAB
+    'transactions': {},  # transaction id -> transaction
+    'category_groups': [],
+    'accounts': [],
+    'fingerprints': {},  # entity type -> snapshot used to detect changes
+    'daily_spending': {},  # date -> {category_id: expense milliunits}
+    'daily_expenses': {},  # date -> {category_id: expense milliunits, transfers excluded}
+    'daily_inflows': {},  # date -> {account_id: inflow milliunits}
+    'daily_flows': {},  # date -> {account_id: net milliunits}
+    'daily_payee_spending': {},  # date -> {payee key: expense milliunits}
+    'daily_payee_visits': {},  # date -> {payee key: transaction count}
+    'version': 0,  # Bumped whenever synced data changes
+    'synced_at': 0,
+    'min_interval': 60  # Widgets expiring within a minute share one sync
+}
+
+# Circuit breaker and error cache around YNAB API calls
+upstream = {
+    'state': 'closed',  # closed, open or half_open
+    'failures': 0,  # Consecutive failed syncs
+    'failure_threshold': 3,  # Failures in a row before the circuit opens
+    'opened_at': 0,
+    'reset_timeout': 120,  # Seconds the circuit stays open before a trial sync
+    'error': None,  # Last sync error, returned until it expires
+    'error_at': 0,
+    'error_ttl': 30,  # Seconds to cache a sync error
+    'request_timeout': 10  # Seconds before a hung YNAB request counts as failed
+}
+
+class TimeoutClient(DefaultClient):
+    """YNAB SDK client whose requests fail instead of hanging when YNAB stops responding"""
+
+    def get(self, endpoint):
+        url = self.config.full_url + endpoint
+        response = requests.get(url, headers=self.headers, timeout=upstream['request_timeout'])
+        if not response.ok:
+            # YNAB errors such as a bad token (401) or rate limiting (429) come as {"error": {"detail": ...}}
+            try:
+                detail = response.json()['error']['detail']
+            except (ValueError, KeyError, TypeError):
+                detail = response.reason
+            raise requests.HTTPError(f"YNAB API error {response.status_code}: {detail}", response=response)
+        return response.json()
+
+def ynab_client(api_token):
+    """YNAB SDK client with request timeouts"""
+    return YNAB(client=TimeoutClient(DefaultConfig(api_token)))
+
+def reset_store():
+    """Drop the local budget copy so the next sync starts from scratch"""
+    store['budget_id'] = None
+    store['server_knowledge'] = None
+    store['transactions'] = {}
+    store['category_groups'] = []
+    store['accounts'] = []
+    store['fingerprints'] = {}
+    store['daily_spending'] = {}
+    store['daily_expenses'] = {}
+    store['daily_inflows'] = {}
+    store['daily_flows'] = {}
+    store['daily_payee_spending'] = {}
+    store['daily_payee_visits'] = {}
+    payee_table['keys'] = {}
+    payee_table['names'] = {}
+    payee_table['variants'] = {}
+    store['version'] += 1
+    store['synced_at'] = 0
+
+# Guards the store and widget caches against concurrent syncs and recomputes
+store_lock = threading.RLock()
+
+# In-flight work by key, so concurrent callers share one upstream fetch
+inflight = {}
+inflight_lock = threading.Lock()
+
+def single_flight(key, fn):
+    """Run fn once for all concurrent callers with the same key.
+
+    The first caller runs fn; callers arriving while it is in flight wait
+    and get the same result (or exception) instead of running fn again.
+    """
+    with inflight_lock:
+        flight = inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = inflight[key] = {'done': threading.Event(), 'result': None, 'exception': None}
+
+    if leader:
+        try:
+            flight['result'] = fn()
+        except Exception as e:
+            flight['exception'] = e
+        finally:
+            with inflight_lock:
+                del inflight[key]
+            flight['done'].set()
+    else:
+        flight['done'].wait()
+
+    if flight['exception'] is not None:
+        raise flight['exception']
+    return flight['result']
+
+def in_flight(key):
+    with inflight_lock:
+        return key in inflight
+
+def trailing_30_day_window():
+    """First date in the last 30 days, today included"""
+    return (datetime.now() - timedelta(days=29)).date().isoformat()
+
+def current_month_window():
+    """First date of the current month"""
+    return datetime.now().replace(day=1).date().isoformat()
+
+def get_savings_account_names():
+    """Savings account names from YNAB_SAVINGS_ACCOUNTS"""
+    savings_accounts_env = os.getenv('YNAB_SAVINGS_ACCOUNTS')
+    if not savings_accounts_env:
+        return []
+    return [acc.strip() for acc in savings_accounts_env.split(',')]
+
+def is_categorized_expense(tx):
+    """Transactions counted by the spending and monthly goals widgets"""
+    return tx.amount < 0 and tx.category_name != 'Uncategorized'
+
+def is_budget_expense(tx):
+    """Transactions and split portions counted as spending by forecasts"""
+    return tx.amount < 0 and tx.transfer_account_id is None and tx.category_id is not None
+
+def is_savings_deposit(tx):
+    """Transactions counted as money saved this month"""
+    if tx.amount <= 0:
+        return False
+    savings_names = get_savings_account_names()
+    return any(account.id == tx.account_id and account.name in savings_names
+               for account in store['accounts'])
+
+def is_merchant_expense(tx):
+    """Transactions counted by the top payees widget"""
+    return tx.amount < 0 and bool(tx.payee_name) and tx.transfer_account_id is None
+
+# Common merchants whose payee names vary by statement, as canonical name -> name prefixes
+DEFAULT_PAYEE_ALIASES = {
+    'Amazon': ['AMZN', 'Amazon'],
+    'Walmart': ['Wal-Mart', 'Walmart', 'WM Supercenter'],
+    'Apple': ['Apple.com', 'Apple Store']
+}
+
+def _clean_payee(name):
+    """Lowercase words of a payee name, without punctuation or store numbers"""
+    words = ''.join(char if char.isalnum() else ' ' for char in name.lower()).split()
+    return ' '.join(word for word in words if not any(char.isdigit() for char in word))
+
+def _load_payee_aliases():
+    """Alias prefixes from the defaults and YNAB_PAYEE_ALIASES, longest first"""
+    aliases = dict(DEFAULT_PAYEE_ALIASES)
+    # Format: Canonical=Variant|Variant;Canonical=Variant
+    aliases_env = os.getenv('YNAB_PAYEE_ALIASES')
+    if aliases_env:
+        for entry in aliases_env.split(';'):
+            if '=' not in entry:
+                continue
+            canonical, variants = entry.split('=', 1)
+            aliases[canonical.strip()] = [variant.strip() for variant in variants.split('|') if variant.strip()]
+
+    prefixes = [(_clean_payee(variant), canonical)
+                for canonical, variants in aliases.items() for variant in variants + [canonical]]
+    return sorted((prefix for prefix in prefixes if prefix[0]), key=lambda prefix: len(prefix[0]), reverse=True)
+
+# Payee normalization table, filled in as new payee names are seen and cleared with the store
+payee_table = {
+    'aliases': _load_payee_aliases(),
+    'keys': {},  # raw payee name -> payee key
+    'names': {},  # payee key -> display name
+    'variants': {}  # payee key -> {raw payee name: latest date seen}
+}
+PAYEE_MAX_VARIANTS = 5  # Raw payee names listed per top payee
+
+def normalize_payee(raw_name):
+    """Map a raw payee name to a key shared by all of its variants"""
+    key = payee_table['keys'].get(raw_name)
+    if key is not None:
+        return key
+
+    cleaned = _clean_payee(raw_name)
+    key = cleaned or raw_name
+    # Display the name without store numbers, e.g. "Trader Joe's #552" -> "Trader Joe's"
+    display_name = ' '.join(word for word in raw_name.split() if not any(char.isdigit() for char in word))
+    for prefix, canonical in payee_table['aliases']:
+        if cleaned == prefix or cleaned.startswith(prefix + ' '):
+            key = display_name = canonical
+            break
+
+    payee_table['keys'][raw_name] = key
+    payee_table['names'].setdefault(key, display_name or raw_name)
+    return key
+
+def get_top_payees_config():
+    """Default (days, limit) for the top payees widget"""
+    days = int(os.getenv('YNAB_TOP_PAYEES_DAYS', '30'))
+    limit = int(os.getenv('YNAB_TOP_PAYEES_LIMIT', '10'))
+    return days, limit
+
+def top_payees_window(days=None):
+    """First date in the top payees window, today included"""
+    if days is None:
+        days, _ = get_top_payees_config()
+    return (datetime.now() - timedelta(days=days - 1)).date().isoformat()
+
+def _add_to_daily_totals(totals, day, key, amount):
+    amounts = totals.setdefault(day, {})
+    amounts[key] = amounts.get(key, 0) + amount
+    if amounts[key] == 0:
+        del amounts[key]
+        if not amounts:
+            del totals[day]
+
+def _apply_transaction(tx, sign):
+    """Add (sign=1) or remove (sign=-1) a transaction from the daily aggregates"""
+    if is_categorized_expense(tx):
+        _add_to_daily_totals(store['daily_spending'], tx.date, tx.category_id, sign * -tx.amount)
+    elif tx.amount > 0:
+        _add_to_daily_totals(store['daily_inflows'], tx.date, tx.account_id, sign * tx.amount)
+    _add_to_daily_totals(store['daily_flows'], tx.date, tx.account_id, sign * tx.amount)
+    # Split transactions count by the categories of their portions
+    for expense in [sub for sub in tx.subtransactions if not sub.deleted] or [tx]:
+        if is_budget_expense(expense):
+            _add_to_daily_totals(store['daily_expenses'], tx.date, expense.category_id, sign * -expense.amount)
+    if is_merchant_expense(tx):
+        payee = normalize_payee(tx.payee_name)
+        _add_to_daily_totals(store['daily_payee_spending'], tx.date, payee, sign * -tx.amount)
+        _add_to_daily_totals(store['daily_payee_visits'], tx.date, payee, sign)
+        if sign > 0:
+            variants = payee_table['variants'].setdefault(payee, {})
+            if tx.date > variants.get(tx.payee_name, ''):
+                variants[tx.payee_name] = tx.date
+
+def _fingerprints(category_groups, accounts):
+    """Snapshot each non-transaction entity type so changes can be detected"""
+    savings_names = get_savings_account_names()
+    return {
+        'category_groups': tuple(
+            (category.id, category.name, group.name)
+            for group in category_groups for category in group.categories
+        ),
+        'category_amounts': tuple(
+            (category.id, category.budgeted, category.balance)
+            for group in category_groups for category in group.categories
+        ),
+        'accounts': tuple(
+            (account.id, account.name, account.type, account.balance, account.closed, account.on_budget)
+            for account in accounts
+        ),
+        'savings_accounts': tuple(
+            (account.id, account.name, account.balance, account.closed)
+            for account in accounts if account.name in savings_names
+        )
+    }
+
+def check_circuit(current_time):
+    """Return an error if YNAB should not be called right now, else None"""
+    if upstream['state'] == 'open':
+        remaining = upstream['reset_timeout'] - (current_time - upstream['opened_at'])
+        if remaining > 0:
+            return f"YNAB unavailable, retrying in {remaining:.0f}s: {upstream['error']}"
+        # Let a single trial sync through
+        upstream['state'] = 'half_open'
+        return None
+
+    if upstream['error'] and (current_time - upstream['error_at']) < upstream['error_ttl']:
+        return upstream['error']
+    return None
+
+def record_upstream_failure(e, current_time):
+    """Cache the error and open the circuit after repeated failures"""
+    error = str(e) or e.__class__.__name__
+    upstream['failures'] += 1
+    upstream['error'] = error
+    upstream['error_at'] = current_time
+    if upstream['state'] == 'half_open' or upstream['failures'] >= upstream['failure_threshold']:
+        upstream['state'] = 'open'
+        upstream['opened_at'] = current_time
+    return error
+
+def record_upstream_success():
+    upstream['state'] = 'closed'
+    upstream['failures'] = 0
+    upstream['error'] = None
+
+def reset_circuit():
+    """Close the circuit and forget past failures"""
+    record_upstream_success()
+    upstream['opened_at'] = 0
+    upstream['error_at'] = 0
+
+def sync_budget(wait=True):
+    """Pull changes from YNAB into the local store and invalidate affected widgets.
+
+    Concurrent callers share a single in-flight sync. With wait=False, a
+    caller that already has synced data uses it as is instead of waiting
+    for a sync another request started. Returns an error message, or None
+    on success.
+    """
+    if not wait and store['synced_at'] and in_flight('sync'):
+        return None
+    return single_flight('sync', _sync_budget)
+
+def _sync_budget():
     current_time = time.time()
-    if cache['data'] and (current_time - cache['timestamp']) < cache['ttl']:
-        return cache['data'], None
-    
+    if (current_time - store['synced_at']) < store['min_interval']:
+        return None
+
+    # Get API token from environment
+    api_token = os.getenv('YNAB_API_TOKEN')
+    budget_id = os.getenv('YNAB_BUDGET_ID') or store['budget_id']
+
+    if not api_token:
+        return "API token not found"
+
+    # Don't call YNAB while it is failing
+    error = check_circuit(current_time)
+    if error:
+        return error
+
     try:
-        # Get API token from environment
-        api_token = os.getenv('YNAB_API_TOKEN')
-        budget_id = os.getenv('YNAB_BUDGET_ID')
-        
-        if not api_token:
-            return None, "API token not found"
-            
         # Initialize YNAB client
-        ynab = YNAB(api_token)
-        
+        ynab = ynab_client(api_token)
+
         # Get budget
-        if budget_id:
-            budget_response = ynab.budgets.get_budget(budget_id)
-            budget = budget_response.data.budget
-        else:
+        if not budget_id:
             budgets_response = ynab.budgets.get_budgets()
             if not budgets_response.data.budgets:
-                return None, "No budgets found"
-            budget = budgets_response.data.budgets[0]
-            budget_id = budget.id
-        
-        # Get transactions
-        transactions_response = ynab.transactions.get_transactions(budget_id)
-        
-        # Get categories
-        categories_response = ynab.categories.get_categories(budget_id)
-        
-        # Process transactions
-        tx_data = []
-        for tx in transactions_response.data.transactions:
-            tx_data.append({
-                'date': tx.date,
-                'amount': tx.amount / 1000,  # Convert from milliunits
-                'category_id': tx.category_id,
-                'category_name': tx.category_name,
-                'payee_name': tx.payee_name
-            })
-        
-        df = pd.DataFrame(tx_data)
-        
-        if df.empty:
-            return None, "No transactions found"
-        
-        # Convert date to datetime
-        df['date'] = pd.to_datetime(df['date'])
-        
-        # Filter to last 30 days and expenses only
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        df = df[df['date'] >= thirty_days_ago]
-        df = df[df['amount'] < 0]  # Only expenses
-        df = df[df['category_name'] != 'Uncategorized']  # Remove uncategorized
-        df['amount'] = df['amount'].abs()  # Make amounts positive
-        
-        # Add category groups
-        category_groups = {}
-        for group in categories_response.data.category_groups:
-            for category in group.categories:
-                category_groups[category.id] = group.name
-        
-        df['category_group'] = df['category_id'].map(category_groups)
-        
-        # Calculate spending by category group
-        category_spending = df.groupby('category_group')['amount'].sum().reset_index()
-        category_spending = category_spending.sort_values('amount', ascending=False)
-        
-        # Filter out Internal Master Category after grouping
-        category_spending = category_spending[category_spending['category_group'] != 'Internal Master Category']
-        
-        # Get top 5
-        top_5 = category_spending.head(5).copy()
-        
-        # Calculate percentages
-        total_spending = df['amount'].sum()
-        top_5['percentage'] = (top_5['amount'] / total_spending * 100).round(1)
-        
-        # Format for display
-        result = []
-        for _, row in top_5.iterrows():
-            result.append({
-                'category_group': row['category_group'],
-                'amount': row['amount'],
-                'amount_formatted': f"{row['amount']:,.0f}",  # US format with commas
-                'percentage': row['percentage']
-            })
-        
-        # Cache the result
-        cache['data'] = result
-        cache['timestamp'] = current_time
-        
-        return result, None
-        
-    except Exception as e:
-        return None, str(e)
+                return record_upstream_failure(ValueError("No budgets found"), current_time)
+            budget_id = budgets_response.data.budgets[0].id
 
-def get_monthly_goals_data():
-    """Get current month spending vs category goals"""
-    
-    # Check cache first
-    current_time = time.time()
-    if monthly_cache['data'] and (current_time - monthly_cache['timestamp']) < monthly_cache['ttl']:
-        return monthly_cache['data'], None
-    
-    try:
-        # Get API token from environment
-        api_token = os.getenv('YNAB_API_TOKEN')
-        budget_id = os.getenv('YNAB_BUDGET_ID')
-        
-        if not api_token:
-            return None, "API token not found"
-            
-        # Initialize YNAB client
-        ynab = YNAB(api_token)
-        
-        # Get budget
-        if budget_id:
-            budget_response = ynab.budgets.get_budget(budget_id)
-            budget = budget_response.data.budget
+        with store_lock:
+            if budget_id != store['budget_id']:
+                reset_store()
+                store['budget_id'] = budget_id
+            server_knowledge = store['server_knowledge']
+
+        # Get transactions, only the ones changed since the last sync when possible
+        if server_knowledge is None:
+            transactions_response = ynab.transactions.get_transactions(budget_id)
         else:
-            budgets_response = ynab.budgets.get_budgets()
-            if not budgets_response.data.budgets:
-                return None, "No budgets found"
-            budget = budgets_response.data.budgets[0]
-            budget_id = budget.id
-        
-        # Get transactions for current month
-        now = datetime.now()
-        start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        transactions_response = ynab.transactions.get_transactions(budget_id)
-        
-        # Get categories with goals
+            transactions_response = TransactionsResponse.from_dict(ynab.client.get(
+                f"/budgets/{budget_id}/transactions?last_knowledge_of_server={server_knowledge}"
+            ))
+
+        # Get categories and accounts
         categories_response = ynab.categories.get_categories(budget_id)
-        
-        # Process transactions for current month
-        tx_data = []
-        for tx in transactions_response.data.transactions:
-            tx_date = pd.to_datetime(tx.date)
-            if tx_date >= start_of_month and tx.amount < 0:  # Current month expenses only
-                tx_data.append({
-                    'date': tx.date,
-                    'amount': abs(tx.amount / 1000),  # Convert from milliunits and make positive
-                    'category_id': tx.category_id,
-                    'category_name': tx.category_name
-                })
-        
-        if not tx_data:
-            return [], None
-        
-        df = pd.DataFrame(tx_data)
-        df = df[df['category_name'] != 'Uncategorized']  # Remove uncategorized
-        
-        # Add category assigned amounts to dataframe using whitelist
-        
-        # Whitelist of specific categories to include (in desired order)
-        # Read from environment variable, fallback to default list
-        categories_env = os.getenv('YNAB_MONTHLY_CATEGORIES')
-        if categories_env:
-            # Split by comma and strip whitespace
-            whitelist_categories = [cat.strip() for cat in categories_env.split(',')]
-        else:
-            # Throw an error
-            raise ValueError("YNAB_MONTHLY_CATEGORIES environment variable is not set")
+        accounts_response = ynab.accounts.get_accounts(budget_id)
 
-        
-        # Build assigned/budgeted amounts and category lookup for whitelisted categories
-        category_assigned = {}
-        category_lookup = {}  # name -> category object
-        for group in categories_response.data.category_groups:
-            for category in group.categories:
-                if category.name in whitelist_categories:
-                    assigned_amount = category.budgeted / 1000 if category.budgeted else 0
-                    category_assigned[category.id] = assigned_amount
-                    category_lookup[category.name] = category
-        
-        # Calculate spending by individual category
-        category_spending = df.groupby(['category_id', 'category_name'])['amount'].sum().reset_index()
-        
-        # Create a lookup for spending amounts
-        spending_lookup = {}
-        for _, row in category_spending.iterrows():
-            spending_lookup[row['category_id']] = row['amount']
-        
-        # Get all whitelisted categories in the specified order
-        result = []
-        for category_name in whitelist_categories:
-            if category_name in category_lookup:
-                category = category_lookup[category_name]
-                category_id = category.id
-                spent = spending_lookup.get(category_id, 0)  # 0 if no spending
-                assigned_amount = category_assigned.get(category_id, 0)
-                
-                # Handle negative assigned amounts (transfers out of category)
-                # If assigned is negative and available is 0, then no overspending occurred
-                available_amount = category.balance / 1000 if category.balance else 0
-                
-                if assigned_amount < 0 and available_amount == 0:
-                    # Money was transferred out and category is at zero - no overspending
-                    difference = 0
-                else:
-                    # Normal calculation
-                    difference = assigned_amount - spent
-                
-                result.append({
-                    'category_name': category_name,
-                    'spent': spent,
-                    'spent_formatted': f"{spent:,.0f}",
-                    'assigned': assigned_amount,
-                    'assigned_formatted': f"{assigned_amount:,.0f}",
-                    'available': available_amount,
-                    'available_formatted': f"{available_amount:,.0f}",
-                    'difference': difference,
-                    'difference_formatted': f"{difference:,.2f}"
-                })
-        
-        # Cache the result
-        monthly_cache['data'] = result
-        monthly_cache['timestamp'] = current_time
-        
-        return result, None
-        
     except Exception as e:
-        return None, str(e)
+        return record_upstream_failure(e, current_time)
+
+    record_upstream_success()
+
+    with store_lock:
+        if store['server_knowledge'] == server_knowledge:
+            _apply_sync(budget_id, transactions_response, categories_response, accounts_response, current_time)
+            return None
+
+    # The store was cleared while we were fetching, so this delta no longer
+    # applies. Fetch again from scratch, outside the lock.
+    return _sync_budget()
+
+def _apply_sync(budget_id, transactions_response, categories_response, accounts_response, current_time):
+    """Apply fetched YNAB data to the store and invalidate affected widgets (store_lock held)"""
+    store['budget_id'] = budget_id
+
+    # Apply transaction changes, keeping the previous version of each
+    transaction_changes = []
+    for tx in transactions_response.data.transactions:
+        previous = store['transactions'].pop(tx.id, None)
+        if previous is not None:
+            _apply_transaction(previous, -1)
+        if not tx.deleted:
+            store['transactions'][tx.id] = tx
+            _apply_transaction(tx, 1)
+        transaction_changes.append((previous, None if tx.deleted else tx))
+
+    store['server_knowledge'] = transactions_response.data.server_knowledge
+    store['category_groups'] = categories_response.data.category_groups
+    store['accounts'] = accounts_response.data.accounts
+
+    fingerprints = _fingerprints(store['category_groups'], store['accounts'])
+    changed_entities = {
+        entity for entity, fingerprint in fingerprints.items()
+        if store['fingerprints'].get(entity) != fingerprint
+    }
+    store['fingerprints'] = fingerprints
+    store['synced_at'] = current_time
+    if transaction_changes or changed_entities:
+        store['version'] += 1
+
+    invalidate_widgets(changed_entities, transaction_changes)
+
+def invalidate_widgets(changed_entities, transaction_changes):
+    """Mark widgets whose declared dependencies intersect the change set as dirty"""
+    for widget in WIDGETS.values():
+        widget_cache = widget['cache']
+        if widget_cache['dirty']:
+            continue
+
+        if widget['depends_on'] & changed_entities:
+            widget_cache['dirty'] = True
+            continue
+
+        if 'transactions' not in widget['depends_on']:
+            continue
+
+        # Only transactions in the widget's window that it would count matter
+        window_start = widget['window']()
+        for previous, current in transaction_changes:
+            if any(tx is not None and tx.date >= window_start and widget['transaction_filter'](tx)
+                   for tx in (previous, current)):
+                widget_cache['dirty'] = True
+                break
+
+def compute_spending_data(window_start):
+    """Top 5 category groups by spending since window_start"""
+    if not store['transactions']:
+        return None, "No transactions found"
+
+    # Add category groups
+    category_groups = {}
+    for group in store['category_groups']:
+        for category in group.categories:
+            category_groups[category.id] = group.name
+
+    # Sum expenses in the window by category group
+    group_spending = {}
+    total_spending = 0
+    for day, daily_spending in store['daily_spending'].items():
+        if day < window_start:
+            continue
+        for category_id, amount in daily_spending.items():
+            total_spending += amount
+
+            category_group = category_groups.get(category_id)
+            if category_group is None:
+                continue
+            group_spending[category_group] = group_spending.get(category_group, 0) + amount
+
+    # Filter out Internal Master Category after grouping
+    group_spending.pop('Internal Master Category', None)
+
+    # Get top 5
+    top_5 = sorted(group_spending.items(), key=lambda item: item[1], reverse=True)[:5]
+
+    # Format for display
+    result = []
+    for category_group, amount in top_5:
+        amount = amount / 1000  # Convert from milliunits
+        result.append({
+            'category_group': category_group,
+            'amount': amount,
+            'amount_formatted': f"{amount:,.0f}",  # US format with commas
+            'percentage': round(amount / (total_spending / 1000) * 100, 1)
+        })
+
+    return result, None
+
+def compute_monthly_goals_data(window_start):
+    """Spending vs assigned amounts for whitelisted categories since window_start"""
+    # Calculate spending by individual category
+    spending_lookup = {}
+    for day, daily_spending in store['daily_spending'].items():
+        if day < window_start:
+            continue
+        for category_id, amount in daily_spending.items():
+            if category_id is None:
+                continue
+            spending_lookup[category_id] = spending_lookup.get(category_id, 0) + amount / 1000
+
+    if not spending_lookup:
+        return [], None
+
+    # Whitelist of specific categories to include (in desired order)
+    # Read from environment variable, fallback to default list
+    categories_env = os.getenv('YNAB_MONTHLY_CATEGORIES')
+    if categories_env:
+        # Split by comma and strip whitespace
+        whitelist_categories = [cat.strip() for cat in categories_env.split(',')]
+    else:
+        # Throw an error
+        raise ValueError("YNAB_MONTHLY_CATEGORIES environment variable is not set")
+
+
+    # Build assigned/budgeted amounts and category lookup for whitelisted categories
+    category_assigned = {}
+    category_lookup = {}  # name -> category object
+    for group in store['category_groups']:
+        for category in group.categories:
+            if category.name in whitelist_categories:
+                assigned_amount = category.budgeted / 1000 if category.budgeted else 0
+                category_assigned[category.id] = assigned_amount
+                category_lookup[category.name] = category
+
+    # Get all whitelisted categories in the specified order
+    result = []
+    for category_name in whitelist_categories:
+        if category_name in category_lookup:
+            category = category_lookup[category_name]
+            category_id = category.id
+            spent = spending_lookup.get(category_id, 0)  # 0 if no spending
+            assigned_amount = category_assigned.get(category_id, 0)
+
+            # Handle negative assigned amounts (transfers out of category)
+            # If assigned is negative and available is 0, then no overspending occurred
+            available_amount = category.balance / 1000 if category.balance else 0
+
+            if assigned_amount < 0 and available_amount == 0:
+                # Money was transferred out and category is at zero - no overspending
+                difference = 0
+            else:
+                # Normal calculation
+                difference = assigned_amount - spent
+
+            result.append({
+                'category_name': category_name,
+                'spent': spent,
+                'spent_formatted': f"{spent:,.0f}",
+                'assigned': assigned_amount,
+                'assigned_formatted': f"{assigned_amount:,.0f}",
+                'available': available_amount,
+                'available_formatted': f"{available_amount:,.0f}",
+                'difference': difference,
+                'difference_formatted': f"{difference:,.2f}"
+            })
+
+    return result, None
+
+def compute_savings_rate_data(window_start):
+    """Savings rate from deposits into savings accounts since window_start"""
+    monthly_income = os.getenv('YNAB_MONTHLY_INCOME')
+    savings_accounts = get_savings_account_names()
+
+    if not monthly_income:
+        return None, "Monthly income not set in environment variables"
+
+    if not savings_accounts:
+        return None, "Savings accounts not specified in environment variables"
 
-def get_savings_rate_data():
-    """Get savings rate based on account balance changes and monthly income"""
-    
-    # Check cache first
-    current_time = time.time()
-    if savings_cache['data'] and (current_time - savings_cache['timestamp']) < savings_cache['ttl']:
-        return savings_cache['data'], None
-    
     try:
-        # Get API token from environment
-        api_token = os.getenv('YNAB_API_TOKEN')
-        budget_id = os.getenv('YNAB_BUDGET_ID')
-        monthly_income = os.getenv('YNAB_MONTHLY_INCOME')
-        savings_accounts_env = os.getenv('YNAB_SAVINGS_ACCOUNTS')
-        
-        if not api_token:
-            return None, "API token not found"
-        
-        if not monthly_income:
-            return None, "Monthly income not set in environment variables"
-            
-        if not savings_accounts_env:
-            return None, "Savings accounts not specified in environment variables"
-            
-        try:
-            monthly_income = float(monthly_income)
-        except ValueError:
-            return None, "Monthly income must be a valid number"
-        
-        # Parse savings accounts list
-        savings_accounts = [acc.strip() for acc in savings_accounts_env.split(',')]
-            
-        # Initialize YNAB client
-        ynab = YNAB(api_token)
-        
-        # Get budget
-        if budget_id:
-            budget_response = ynab.budgets.get_budget(budget_id)
-            budget = budget_response.data.budget
+        monthly_income = float(monthly_income)
+    except ValueError:
+        return None, "Monthly income must be a valid number"
+
+    # Find savings accounts and get current balances
+    savings_account_data = []
+    total_current_balance = 0
+
+    for account in store['accounts']:
+        if account.name in savings_accounts and not account.closed:
+            current_balance = account.balance / 1000  # Convert from milliunits
+            total_current_balance += current_balance
+
+            savings_account_data.append({
+                'name': account.name,
+                'id': account.id,
+                'current_balance': current_balance,
+                'current_balance_formatted': f"{current_balance:,.2f}"
+            })
+
+    if not savings_account_data:
+        return None, f"No open savings accounts found matching: {', '.join(savings_accounts)}"
+
+    # Calculate monthly savings from deposits into savings accounts this month
+    monthly_savings = 0
+    savings_account_ids = [acc['id'] for acc in savings_account_data]
+
+    for day, daily_inflows in store['daily_inflows'].items():
+        if day < window_start:
+            continue
+        for account_id in savings_account_ids:
+            monthly_savings += daily_inflows.get(account_id, 0) / 1000  # Convert from milliunits
+
+    # Calculate savings rate
+    savings_rate = (monthly_savings / monthly_income * 100) if monthly_income > 0 else 0
+
+    # Prepare result
+    result = {
+        'monthly_income': monthly_income,
+        'monthly_income_formatted': f"{monthly_income:,.2f}",
+        'monthly_savings': monthly_savings,
+        'monthly_savings_formatted': f"{monthly_savings:,.2f}",
+        'savings_rate': round(savings_rate, 1),
+        'total_savings_balance': total_current_balance,
+        'total_savings_balance_formatted': f"{total_current_balance:,.2f}",
+        'accounts': savings_account_data,
+        'month': datetime.now().strftime('%B %Y')
+    }
+
+    return result, None
+
+def updated_timestamp():
+    return datetime.now().strftime('%B %d, %Y at %I:%M %p')
+
+def compute_net_worth_data(window):
+    """Net worth from all open account balances"""
+    # Initialize categories for net worth calculation
+    assets = {
+        'checking': [],
+        'savings': [],
+        'investment': [],
+        'retirement': [],
+        'property': [],
+        'other_assets': []
+    }
+
+    liabilities = {
+        'credit_cards': [],
+        'loans': [],
+        'other_debt': []
+    }
+
+    total_assets = 0
+    total_liabilities = 0
+
+    # Process each account
+    for account in store['accounts']:
+        if account.closed:
+            continue  # Skip closed accounts
+
+        balance = account.balance / 1000  # Convert from milliunits
+        account_data = {
+            'name': account.name,
+            'balance': balance,
+            'balance_formatted': f"{balance:,.2f}",
+            'on_budget': account.on_budget
+        }
+
+        # Categorize accounts by type
+        if account.type == 'checking':
+            assets['checking'].append(account_data)
+            if balance > 0:
+                total_assets += balance
+            else:
+                total_liabilities += abs(balance)
+
+        elif account.type == 'savings':
+            assets['savings'].append(account_data)
+            if balance > 0:
+                total_assets += balance
+            else:
+                total_liabilities += abs(balance)
+
+        elif account.type == 'creditCard':
+            liabilities['credit_cards'].append(account_data)
+            total_liabilities += abs(balance)  # Credit card balances are negative
+
+        elif account.type in ['autoLoan', 'studentLoan', 'personalLoan', 'mortgageLoan']:
+            liabilities['loans'].append(account_data)
+            total_liabilities += abs(balance)  # Loan balances are negative
+
+        elif account.type == 'otherAsset':
+            # Determine if it's investment/retirement based on name
+            name_lower = account.name.lower()
+            if any(term in name_lower for term in ['401k', '403b', 'ira', 'roth', 'pension']):
+                assets['retirement'].append(account_data)
+            elif any(term in name_lower for term in ['investment', 'brokerage', 'stock', 'etf', 'mutual']):
+                assets['investment'].append(account_data)
+            elif any(term in name_lower for term in ['house', 'home', 'property', 'real estate', 'car', 'vehicle']):
+                assets['property'].append(account_data)
+            else:
+                assets['other_assets'].append(account_data)
+
+            if balance > 0:
+                total_assets += balance
+            else:
+                total_liabilities += abs(balance)
+
+        elif account.type == 'otherDebt':
+            liabilities['other_debt'].append(account_data)
+            total_liabilities += abs(balance)
+
         else:
-            budgets_response = ynab.budgets.get_budgets()
-            if not budgets_response.data.budgets:
-                return None, "No budgets found"
-            budget = budgets_response.data.budgets[0]
-            budget_id = budget.id
-        
-        # Get accounts
-        accounts_response = ynab.accounts.get_accounts(budget_id)
-        
-        # Find savings accounts and get current balances
-        savings_account_data = []
-        total_current_balance = 0
-        
-        for account in accounts_response.data.accounts:
-            if account.name in savings_accounts and not account.closed:
-                current_balance = account.balance / 1000  # Convert from milliunits
-                total_current_balance += current_balance
-                
-                savings_account_data.append({
-                    'name': account.name,
-                    'id': account.id,
-                    'current_balance': current_balance,
-                    'current_balance_formatted': f"{current_balance:,.2f}"
-                })
-        
-        if not savings_account_data:
-            return None, f"No open savings accounts found matching: {', '.join(savings_accounts)}"
-        
-        # Calculate monthly savings (simplified approach using transactions)
-        # Get transactions for current month to savings accounts
-        now = datetime.now()
-        start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        transactions_response = ynab.transactions.get_transactions(budget_id)
-        
-        monthly_savings = 0
-        savings_account_ids = [acc['id'] for acc in savings_account_data]
-        
-        for tx in transactions_response.data.transactions:
-            tx_date = pd.to_datetime(tx.date)
-            if (tx_date >= start_of_month and 
-                tx.account_id in savings_account_ids and 
-                tx.amount > 0):  # Positive amounts are money going into the account
-                monthly_savings += tx.amount / 1000  # Convert from milliunits
-        
-        # Calculate savings rate
-        savings_rate = (monthly_savings / monthly_income * 100) if monthly_income > 0 else 0
-        
-        # Prepare result
-        result = {
-            'monthly_income': monthly_income,
-            'monthly_income_formatted': f"{monthly_income:,.2f}",
-            'monthly_savings': monthly_savings,
-            'monthly_savings_formatted': f"{monthly_savings:,.2f}",
-            'savings_rate': round(savings_rate, 1),
-            'total_savings_balance': total_current_balance,
-            'total_savings_balance_formatted': f"{total_current_balance:,.2f}",
-            'accounts': savings_account_data,
-            'month': now.strftime('%B %Y')
+            # Catch-all for unknown account types
+            assets['other_assets'].append(account_data)
+            if balance > 0:
+                total_assets += balance
+            else:
+                total_liabilities += abs(balance)
+
+    # Calculate net worth
+    net_worth = total_assets - total_liabilities
+
+    # Calculate totals for each category
+    asset_totals = {}
+    for category, accounts in assets.items():
+        total = sum(acc['balance'] for acc in accounts if acc['balance'] > 0)
+        asset_totals[category] = {
+            'total': total,
+            'total_formatted': f"{total:,.2f}",
+            'accounts': accounts,
+            'count': len(accounts)
         }
-        
+
+    liability_totals = {}
+    for category, accounts in liabilities.items():
+        total = sum(abs(acc['balance']) for acc in accounts)
+        liability_totals[category] = {
+            'total': total,
+            'total_formatted': f"{total:,.2f}",
+            'accounts': accounts,
+            'count': len(accounts)
+        }
+
+    # Prepare result
+    result = {
+        'net_worth': net_worth,
+        'net_worth_formatted': f"{net_worth:,.2f}",
+        'total_assets': total_assets,
+        'total_assets_formatted': f"{total_assets:,.2f}",
+        'total_liabilities': total_liabilities,
+        'total_liabilities_formatted': f"{total_liabilities:,.2f}",
+        'assets': asset_totals,
+        'liabilities': liability_totals,
+        'updated': updated_timestamp()
+    }
+
+    return result, None
+
+def compute_top_payees_data(window_start, limit=None, sort='spend'):
+    """Top payees by spend or visits since window_start"""
+    if limit is None:
+        _, limit = get_top_payees_config()
+
+    # Sum per-payee daily totals over the window
+    spending = {}
+    for day, daily_spending in store['daily_payee_spending'].items():
+        if day < window_start:
+            continue
+        for payee, amount in daily_spending.items():
+            spending[payee] = spending.get(payee, 0) + amount
+
+    visits = {}
+    for day, daily_visits in store['daily_payee_visits'].items():
+        if day < window_start:
+            continue
+        for payee, count in daily_visits.items():
+            visits[payee] = visits.get(payee, 0) + count
+
+    # Exact top-K without sorting every payee
+    if sort == 'visits':
+        top = heapq.nlargest(limit, visits, key=lambda payee: (visits[payee], spending.get(payee, 0)))
+    else:
+        top = heapq.nlargest(limit, spending, key=lambda payee: (spending[payee], visits.get(payee, 0)))
+
+    total_spending = sum(spending.values())
+
+    # Format for display
+    result = []
+    for payee in top:
+        amount = spending.get(payee, 0) / 1000  # Convert from milliunits
+        count = visits.get(payee, 0)
+        average = amount / count if count else 0
+        # Raw names seen in the window, most recent first
+        seen = payee_table['variants'].get(payee, {})
+        variants = sorted((name for name, day in seen.items() if day >= window_start),
+                          key=lambda name: seen[name], reverse=True)
+        result.append({
+            'payee_name': payee_table['names'].get(payee, payee),
+            'amount': amount,
+            'amount_formatted': f"{amount:,.0f}",  # US format with commas
+            'visits': count,
+            'average': average,
+            'average_formatted': f"{average:,.2f}",
+            'percentage': round(amount / (total_spending / 1000) * 100, 1) if total_spending else 0,
+            'variants': variants[:PAYEE_MAX_VARIANTS],
+            'variant_count': len(variants)
+        })
+
+    return result, None
+
+# Widgets and the entity types they depend on. Widgets that depend on
+# transactions are only invalidated by changes inside their window that
+# pass their transaction filter.
+WIDGETS = {
+    'spending': {
+        'cache': cache,
+        'compute': compute_spending_data,
+        'depends_on': {'transactions', 'category_groups'},
+        'window': trailing_30_day_window,
+        'transaction_filter': is_categorized_expense,
+        'glance_key': 'categories'
+    },
+    'monthly_goals': {
+        'cache': monthly_cache,
+        'compute': compute_monthly_goals_data,
+        'depends_on': {'transactions', 'category_groups', 'category_amounts'},
+        'window': current_month_window,
+        'transaction_filter': is_categorized_expense,
+        'glance_key': 'categories'
+    },
+    'savings_rate': {
+        'cache': savings_cache,
+        'compute': compute_savings_rate_data,
+        'depends_on': {'transactions', 'savings_accounts'},
+        'window': current_month_window,
+        'transaction_filter': is_savings_deposit,
+        'glance_key': 'savings_data'
+    },
+    'net_worth': {
+        'cache': net_worth_cache,
+        'compute': compute_net_worth_data,
+        'depends_on': {'accounts'},
+        'window': None,
+        'transaction_filter': None,
+        'glance_key': 'net_worth_data'
+    },
+    'top_payees': {
+        'cache': payees_cache,
+        'compute': compute_top_payees_data,
+        'depends_on': {'transactions'},
+        'window': top_payees_window,
+        'transaction_filter': is_merchant_expense,
+        'glance_key': 'payees'
+    }
+}
+
+def refresh_widget(name):
+    """Recompute a widget if a sync invalidated it or its window moved"""
+    widget = WIDGETS[name]
+    widget_cache = widget['cache']
+
+    with store_lock:
+        current_time = time.time()
+
+        # Reuse the cached result if nothing it depends on changed
+        window = widget['window']() if widget['window'] else None
+        if widget_cache['data'] and not widget_cache['dirty'] and widget_cache['window'] == window:
+            # The data was just confirmed current, so its update time moves forward too
+            if isinstance(widget_cache['data'], dict) and 'updated' in widget_cache['data']:
+                widget_cache['data'] = dict(widget_cache['data'], updated=updated_timestamp())
+            widget_cache['timestamp'] = current_time
+            return widget_cache['data'], None
+
+        result, error = widget['compute'](window)
+        if error:
+            publish_widget(name, None, error)
+            return None, error
+
         # Cache the result
-        savings_cache['data'] = result
-        savings_cache['timestamp'] = current_time
-        
+        widget_cache['data'] = result
+        widget_cache['timestamp'] = current_time
+        widget_cache['dirty'] = False
+        widget_cache['window'] = window
+
+        publish_widget(name, result)
         return result, None
-        
+
+def get_widget_data(name):
+    """Return cached widget data, syncing and recomputing only when needed"""
+    widget_cache = WIDGETS[name]['cache']
+
+    # Check cache first
+    current_time = time.time()
+    if widget_cache['data'] and (current_time - widget_cache['timestamp']) < widget_cache['ttl']:
+        return widget_cache['data'], None
+
+    # While a refresh is running, serve the previous data instead of waiting on YNAB
+    if widget_cache['data'] and (in_flight(name) or in_flight('sync')):
+        return widget_cache['data'], None
+
+    # Requests arriving during a first load wait for it instead of starting their own
+    return single_flight(name, lambda: _refresh_expired_widget(name))
+
+def _refresh_expired_widget(name):
+    widget_cache = WIDGETS[name]['cache']
+
+    # The previous flight may have refreshed it just before this one started
+    current_time = time.time()
+    if widget_cache['data'] and (current_time - widget_cache['timestamp']) < widget_cache['ttl']:
+        return widget_cache['data'], None
+
+    try:
+        error = sync_budget()
+        if error:
+            # Serve the last-known-good snapshot while YNAB is failing
+            if widget_cache['data']:
+                return widget_cache['data'], None
+            if not store['synced_at']:
+                return None, error
+
+        return refresh_widget(name)
+
     except Exception as e:
         return None, str(e)
 
+def clear_widget_cache(widget_cache):
+    widget_cache['data'] = None
+    widget_cache['timestamp'] = 0
+    widget_cache['dirty'] = True
+    widget_cache['window'] = None
+
+def get_ynab_spending_data():
+    """Get top 5 spending categories from last 30 days"""
+    return get_widget_data('spending')
+
+def get_monthly_goals_data():
+    """Get current month spending vs category goals"""
+    return get_widget_data('monthly_goals')
+
+def get_savings_rate_data():
+    """Get savings rate based on account balance changes and monthly income"""
+    return get_widget_data('savings_rate')
+
 def get_net_worth_data():
     """Calculate net worth from all account balances"""
-    
-    # Check cache first
-    current_time = time.time()
-    if net_worth_cache['data'] and (current_time - net_worth_cache['timestamp']) < net_worth_cache['ttl']:
-        return net_worth_cache['data'], None
-    
+    return get_widget_data('net_worth')
+
+def get_top_payees_data(days=None, limit=None, sort='spend'):
+    """Get top payees by spend or visits, using the cached widget for the defaults"""
+    data, error = get_widget_data('top_payees')
+    if error or (days is None and limit is None and sort == 'spend'):
+        return data, error
+
     try:
-        # Get API token from environment
-        api_token = os.getenv('YNAB_API_TOKEN')
-        budget_id = os.getenv('YNAB_BUDGET_ID')
-        
-        if not api_token:
-            return None, "API token not found"
-            
-        # Initialize YNAB client
-        ynab = YNAB(api_token)
-        
-        # Get budget
-        if budget_id:
-            budget_response = ynab.budgets.get_budget(budget_id)
-            budget = budget_response.data.budget
-        else:
-            budgets_response = ynab.budgets.get_budgets()
-            if not budgets_response.data.budgets:
-                return None, "No budgets found"
-            budget = budgets_response.data.budgets[0]
-            budget_id = budget.id
-        
-        # Get all accounts
-        accounts_response = ynab.accounts.get_accounts(budget_id)
-        
-        # Initialize categories for net worth calculation
-        assets = {
-            'checking': [],
-            'savings': [],
-            'investment': [],
-            'retirement': [],
-            'property': [],
-            'other_assets': []
-        }
-        
-        liabilities = {
-            'credit_cards': [],
-            'loans': [],
-            'other_debt': []
-        }
-        
-        total_assets = 0
-        total_liabilities = 0
-        
-        # Process each account
-        for account in accounts_response.data.accounts:
-            if account.closed:
-                continue  # Skip closed accounts
-                
-            balance = account.balance / 1000  # Convert from milliunits
-            account_data = {
-                'name': account.name,
-                'balance': balance,
-                'balance_formatted': f"{balance:,.2f}",
-                'on_budget': account.on_budget
-            }
-            
-            # Categorize accounts by type
-            if account.type == 'checking':
-                assets['checking'].append(account_data)
-                if balance > 0:
-                    total_assets += balance
-                else:
-                    total_liabilities += abs(balance)
-            
-            elif account.type == 'savings':
-                assets['savings'].append(account_data)
-                if balance > 0:
-                    total_assets += balance
-                else:
-                    total_liabilities += abs(balance)
-            
-            elif account.type == 'creditCard':
-                liabilities['credit_cards'].append(account_data)
-                total_liabilities += abs(balance)  # Credit card balances are negative
-            
-            elif account.type in ['autoLoan', 'studentLoan', 'personalLoan', 'mortgageLoan']:
-                liabilities['loans'].append(account_data)
-                total_liabilities += abs(balance)  # Loan balances are negative
-            
-            elif account.type == 'otherAsset':
-                # Determine if it's investment/retirement based on name
-                name_lower = account.name.lower()
-                if any(term in name_lower for term in ['401k', '403b', 'ira', 'roth', 'pension']):
-                    assets['retirement'].append(account_data)
-                elif any(term in name_lower for term in ['investment', 'brokerage', 'stock', 'etf', 'mutual']):
-                    assets['investment'].append(account_data)
-                elif any(term in name_lower for term in ['house', 'home', 'property', 'real estate', 'car', 'vehicle']):
-                    assets['property'].append(account_data)
-                else:
-                    assets['other_assets'].append(account_data)
-                
-                if balance > 0:
-                    total_assets += balance
-                else:
-                    total_liabilities += abs(balance)
-            
-            elif account.type == 'otherDebt':
-                liabilities['other_debt'].append(account_data)
-                total_liabilities += abs(balance)
-            
-            else:
-                # Catch-all for unknown account types
-                assets['other_assets'].append(account_data)
-                if balance > 0:
-                    total_assets += balance
-                else:
-                    total_liabilities += abs(balance)
-        
-        # Calculate net worth
-        net_worth = total_assets - total_liabilities
-        
-        # Calculate totals for each category
-        asset_totals = {}
-        for category, accounts in assets.items():
-            total = sum(acc['balance'] for acc in accounts if acc['balance'] > 0)
-            asset_totals[category] = {
-                'total': total,
-                'total_formatted': f"{total:,.2f}",
-                'accounts': accounts,
-                'count': len(accounts)
+        with store_lock:
+            return compute_top_payees_data(top_payees_window(days), limit, sort)
+    except Exception as e:
+        return None, str(e)
+
+# Forecast baseline and month-end summary, cached per data version and date.
+# Holds (key, baseline, month_end), replaced in one assignment under store_lock.
+forecast_cache = {
+    'entry': None
+}
+
+FORECAST_ALPHA = 0.3  # Smoothing factor for simple exponential smoothing
+FORECAST_HISTORY_MONTHS = 36  # Completed months of history used for forecasts
+FORECAST_SEASONAL_MONTHS = 24  # History needed before applying seasonal factors
+FORECAST_MAX_SCENARIOS = 50
+# Scenario parameters and their allowed (min, max) values
+SCENARIO_PARAMETERS = {
+    'income_change': (-1e7, 1e7),  # Dollars per month
+    'spending_change': (-100, 1000),  # Percent
+    'extra_payment': (-1e7, 1e7)  # Dollars per month
+}
+
+def _month_key(day):
+    return day.strftime('%Y-%m')
+
+def _add_months(day, months):
+    month_index = day.year * 12 + day.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+def _monthly_totals(daily_totals, months, keys=None):
+    """Sum daily totals into {key: [milliunits per month]} for the given months"""
+    index = {month: i for i, month in enumerate(months)}
+    totals = {}
+    for day, amounts in daily_totals.items():
+        i = index.get(day[:7])
+        if i is None:
+            continue
+        for key, amount in amounts.items():
+            if keys is not None and key not in keys:
+                continue
+            totals.setdefault(key, [0] * len(months))[i] += amount
+    return totals
+
+def _month_to_date(daily_totals, month_start, keys=None):
+    """Sum daily totals from month_start through today into {key: milliunits}"""
+    totals = {}
+    start = month_start.isoformat()
+    end = date.today().isoformat()
+    for day, amounts in daily_totals.items():
+        if day < start or day > end:
+            continue
+        for key, amount in amounts.items():
+            if keys is None or key in keys:
+                totals[key] = totals.get(key, 0) + amount
+    return totals
+
+def forecast_series(values, history_months, future_months, additive=False):
+    """Project a monthly series with seasonally adjusted simple exponential smoothing.
+
+    Seasonality is multiplicative (month average / mean) for series that are
+    always positive, and additive (month average - mean) otherwise, since
+    ratios to a mean near or below zero flip sign or blow up. Net cash flow
+    should always use additive=True.
+    """
+    if not values:
+        return [0] * len(future_months)
+
+    # Seasonal effect per calendar month, once there are two years of history
+    mean = sum(values) / len(values)
+    additive = additive or min(values) <= 0
+    effects = {}
+    if len(values) >= FORECAST_SEASONAL_MONTHS:
+        by_month = {}
+        for month, value in zip(history_months, values):
+            by_month.setdefault(month[5:], []).append(value)
+        for month, vals in by_month.items():
+            month_avg = sum(vals) / len(vals)
+            effects[month] = month_avg - mean if additive else month_avg / mean
+
+    neutral = 0 if additive else 1
+    level = None
+    for month, value in zip(history_months, values):
+        effect = effects.get(month[5:], neutral)
+        adjusted = value - effect if additive else value / effect
+        level = adjusted if level is None else FORECAST_ALPHA * adjusted + (1 - FORECAST_ALPHA) * level
+
+    if additive:
+        return [level + effects.get(month[5:], 0) for month in future_months]
+    return [level * effects.get(month[5:], 1) for month in future_months]
+
+def build_forecast_baseline():
+    """Baseline month-end and 12-month projections from the local store"""
+    today = date.today()
+    month_start = today.replace(day=1)
+    days_in_month = (_add_months(month_start, 1) - month_start).days
+    elapsed_days = today.day
+    remaining_days = days_in_month - elapsed_days
+
+    # Completed months of history, starting at the first month with data
+    first_day = min(store['daily_flows'], default=month_start.isoformat())
+    first_month = date.fromisoformat(first_day).replace(day=1)
+    history_count = min(FORECAST_HISTORY_MONTHS,
+                        (month_start.year - first_month.year) * 12 + month_start.month - first_month.month)
+    history_months = [_month_key(_add_months(month_start, i - history_count)) for i in range(history_count)]
+    future_months = [_month_key(_add_months(month_start, i)) for i in range(1, 13)]
+
+    savings_names = get_savings_account_names()
+    savings_ids = {account.id for account in store['accounts'] if account.name in savings_names}
+
+    category_names = {}
+    for group in store['category_groups']:
+        for category in group.categories:
+            category_names[category.id] = category.name
+
+    # Historical monthly totals, with transfers such as card payments left out of spending
+    category_history = _monthly_totals(store['daily_expenses'], history_months)
+    spending_history = [sum(values) for values in zip(*category_history.values())] or [0] * history_count
+    savings_history = [sum(values) for values in zip(*_monthly_totals(
+        store['daily_inflows'], history_months, savings_ids).values())] or [0] * history_count
+    flow_history = [sum(values) for values in zip(*_monthly_totals(
+        store['daily_flows'], history_months).values())] or [0] * history_count
+
+    # Month to date, projected to month end at the current daily run-rate
+    category_mtd = _month_to_date(store['daily_expenses'], month_start)
+    savings_mtd = sum(_month_to_date(store['daily_inflows'], month_start, savings_ids).values())
+    flow_mtd = sum(_month_to_date(store['daily_flows'], month_start).values())
+    run_rate = days_in_month / elapsed_days
+
+    net_worth, _ = compute_net_worth_data(None)
+
+    return {
+        'month': month_start.strftime('%B %Y'),
+        'history_months': len(history_months),
+        'future_months': future_months,
+        'category_names': category_names,
+        'category_mtd': {key: value / 1000 for key, value in category_mtd.items()},
+        'category_month_end': {key: value * run_rate / 1000 for key, value in category_mtd.items()},
+        'savings_mtd': savings_mtd / 1000,
+        'savings_month_end': savings_mtd * run_rate / 1000,
+        'net_worth_now': net_worth['net_worth'],
+        'net_worth_month_end': net_worth['net_worth'] + flow_mtd / elapsed_days * remaining_days / 1000,
+        'total_liabilities': net_worth['total_liabilities'],
+        'category_forecast': {
+            key: [value / 1000 for value in forecast_series(values, history_months, future_months)]
+            for key, values in category_history.items()
+        },
+        'spending_forecast': [value / 1000 for value in forecast_series(spending_history, history_months, future_months)],
+        'savings_forecast': [value / 1000 for value in forecast_series(savings_history, history_months, future_months)],
+        'flow_forecast': [value / 1000 for value in forecast_series(flow_history, history_months, future_months, additive=True)]
+    }
+
+def run_scenarios(baseline, scenarios, monthly_income):
+    """Apply every scenario to the shared baseline projections in one pass"""
+    months = len(baseline['future_months'])
+    results = []
+    for scenario in scenarios:
+        income = monthly_income + scenario['income_change'] if monthly_income is not None else None
+        spending_factor = 1 + scenario['spending_change'] / 100
+
+        # Money not spent and extra income are saved; extra payments move savings to debt
+        spending = [value * spending_factor for value in baseline['spending_forecast']]
+        kept = [scenario['income_change'] + base - value
+                for base, value in zip(baseline['spending_forecast'], spending)]
+        savings = [base + extra - scenario['extra_payment']
+                   for base, extra in zip(baseline['savings_forecast'], kept)]
+        flows = [base + extra for base, extra in zip(baseline['flow_forecast'], kept)]
+
+        net_worth = []
+        running = baseline['net_worth_month_end']
+        for flow in flows:
+            running += flow
+            net_worth.append(running)
+        liabilities = [max(0, baseline['total_liabilities'] - scenario['extra_payment'] * (i + 1))
+                       for i in range(months)]
+        savings_rates = [round(value / income * 100, 1) if income else None for value in savings]
+
+        categories = sorted((
+            {
+                'category_name': baseline['category_names'].get(key, 'Other'),
+                'projected_12_months': total,
+                'projected_12_months_formatted': f"{total:,.0f}"
             }
-        
-        liability_totals = {}
-        for category, accounts in liabilities.items():
-            total = sum(abs(acc['balance']) for acc in accounts)
-            liability_totals[category] = {
-                'total': total,
-                'total_formatted': f"{total:,.2f}",
-                'accounts': accounts,
-                'count': len(accounts)
+            for key, total in (
+                (key, sum(values) * spending_factor) for key, values in baseline['category_forecast'].items()
+            ) if total > 0
+        ), key=lambda item: item['projected_12_months'], reverse=True)
+
+        total_spending = sum(spending)
+        total_savings = sum(savings)
+        results.append({
+            'name': scenario['name'],
+            'parameters': {key: scenario[key] for key in SCENARIO_PARAMETERS},
+            'months': [{
+                'month': datetime.strptime(month, '%Y-%m').strftime('%B %Y'),
+                'spending': spending[i],
+                'savings': savings[i],
+                'savings_rate': savings_rates[i],
+                'net_worth': net_worth[i],
+                'total_liabilities': liabilities[i]
+            } for i, month in enumerate(baseline['future_months'])],
+            'twelve_months': {
+                'spending': total_spending,
+                'spending_formatted': f"{total_spending:,.0f}",
+                'savings': total_savings,
+                'savings_formatted': f"{total_savings:,.2f}",
+                'savings_rate': round(total_savings / (income * months) * 100, 1) if income else None,
+                'net_worth': net_worth[-1],
+                'net_worth_formatted': f"{net_worth[-1]:,.2f}",
+                'categories': categories
             }
-        
-        # Prepare result
+        })
+    return results
+
+def parse_scenarios(raw_scenarios):
+    """Validate what-if scenarios, returning (scenarios, error)"""
+    if not isinstance(raw_scenarios, list) or len(raw_scenarios) > FORECAST_MAX_SCENARIOS:
+        return None, f"scenarios must be a list of at most {FORECAST_MAX_SCENARIOS} objects"
+
+    scenarios = [{'name': 'baseline', 'income_change': 0, 'spending_change': 0, 'extra_payment': 0}]
+    for i, raw in enumerate(raw_scenarios):
+        if not isinstance(raw, dict):
+            return None, f"Scenario {i + 1} must be an object"
+        scenario = {'name': str(raw.get('name', f"scenario {i + 1}"))}
+        for key, (low, high) in SCENARIO_PARAMETERS.items():
+            value = raw.get(key, 0)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                return None, f"Scenario {i + 1}: {key} must be a number"
+            # Checked in this order so huge ints don't overflow math.isfinite
+            if not low <= value <= high or not math.isfinite(value):
+                return None, f"Scenario {i + 1}: {key} must be between {low:g} and {high:g}"
+            scenario[key] = value
+        scenarios.append(scenario)
+    return scenarios, None
+
+def forecast_month_end(baseline, monthly_income):
+    """Month-end projection summary from the baseline"""
+    month_end_spending = sum(baseline['category_month_end'].values())
+    month_end_categories = sorted((
+        {
+            'category_name': baseline['category_names'].get(key, 'Other'),
+            'spent': baseline['category_mtd'][key],
+            'spent_formatted': f"{baseline['category_mtd'][key]:,.0f}",
+            'projected': projected,
+            'projected_formatted': f"{projected:,.0f}"
+        }
+        for key, projected in baseline['category_month_end'].items()
+    ), key=lambda item: item['projected'], reverse=True)
+
+    return {
+        'month': baseline['month'],
+        'spending': month_end_spending,
+        'spending_formatted': f"{month_end_spending:,.0f}",
+        'savings': baseline['savings_month_end'],
+        'savings_formatted': f"{baseline['savings_month_end']:,.2f}",
+        'savings_rate': round(baseline['savings_month_end'] / monthly_income * 100, 1) if monthly_income else None,
+        'net_worth': baseline['net_worth_month_end'],
+        'net_worth_formatted': f"{baseline['net_worth_month_end']:,.2f}",
+        'categories': month_end_categories
+    }
+
+def get_forecast_data(scenarios):
+    """Month-end and 12-month projections for the baseline and what-if scenarios"""
+    try:
+        error = sync_budget(wait=False)
+    except Exception as e:
+        error = str(e)
+    if error and not store['synced_at']:
+        return None, error
+
+    monthly_income = os.getenv('YNAB_MONTHLY_INCOME')
+    try:
+        monthly_income = float(monthly_income) if monthly_income else None
+    except ValueError:
+        return None, "Monthly income must be a valid number"
+
+    try:
+        with store_lock:
+            key = (store['version'], date.today(), monthly_income)
+            entry = forecast_cache['entry']
+            if entry is None or entry[0] != key:
+                baseline = build_forecast_baseline()
+                entry = forecast_cache['entry'] = (key, baseline, forecast_month_end(baseline, monthly_income))
+        _, baseline, month_end = entry
+
+        # Scenarios are cheap to apply to the cached baseline, so they aren't cached
         result = {
-            'net_worth': net_worth,
-            'net_worth_formatted': f"{net_worth:,.2f}",
-            'total_assets': total_assets,
-            'total_assets_formatted': f"{total_assets:,.2f}",
-            'total_liabilities': total_liabilities,
-            'total_liabilities_formatted': f"{total_liabilities:,.2f}",
-            'assets': asset_totals,
-            'liabilities': liability_totals,
-            'updated': datetime.now().strftime('%B %d, %Y at %I:%M %p')
+            'month_end': month_end,
+            'scenarios': run_scenarios(baseline, scenarios, monthly_income),
+            'history_months': baseline['history_months'],
+            'method': 'Month end: month-to-date run-rate. 12 months: simple exponential smoothing '
+                      f'(alpha {FORECAST_ALPHA}), seasonally adjusted with {FORECAST_SEASONAL_MONTHS}+ months of history.'
         }
-        
-        # Cache the result
-        net_worth_cache['data'] = result
-        net_worth_cache['timestamp'] = current_time
-        
         return result, None
-        
+
     except Exception as e:
         return None, str(e)
 
+def glance_payload(name, data):
+    """Format widget data the way its Glance endpoint returns it"""
+    glance_key = WIDGETS[name]['glance_key']
+    response = {
+        glance_key: data,
+        'updated': datetime.now().strftime('%I:%M %p')
+    }
+    if glance_key == 'categories':
+        response['total_categories'] = len(data)
+    return response
+
+# Latest serialized payload per widget, shared by all /stream subscribers
+stream_state = {
+    'condition': threading.Condition(),
+    'payloads': {},  # widget name -> (data, serialized event)
+    'versions': {},  # widget name -> number of times it was published
+    'subscribers': 0,
+    'thread': None,
+    'interval': int(os.getenv('YNAB_SYNC_INTERVAL', '300')),  # Seconds between background syncs
+    'keepalive': 15  # Seconds between keepalive comments on idle streams
+}
+
+def publish_widget(name, data, error=None):
+    """Push a widget payload to stream subscribers if its data changed"""
+    with stream_state['condition']:
+        previous = stream_state['payloads'].get(name)
+        if previous is not None and previous[0] == (data, error):
+            return
+        payload = {'error': error} if error else glance_payload(name, data)
+        event = f"event: {name}\ndata: {json.dumps(payload)}\n\n"
+        stream_state['payloads'][name] = ((data, error), event)
+        stream_state['versions'][name] = stream_state['versions'].get(name, 0) + 1
+        stream_state['condition'].notify_all()
+
+def background_sync_loop():
+    """Sync on an interval and recompute widgets so subscribers get pushed updates.
+
+    Exits once no subscribers are left, so idle dashboards don't spend the
+    YNAB rate limit; the next subscriber starts a new thread.
+    """
+    while True:
+        try:
+            error = sync_budget()
+            if error:
+                app.logger.warning("Background sync failed: %s", error)
+            else:
+                for name in WIDGETS:
+                    try:
+                        refresh_widget(name)
+                    except Exception as e:
+                        publish_widget(name, None, str(e))
+        except Exception as e:
+            app.logger.warning("Background sync failed: %s", e)
+        time.sleep(stream_state['interval'])
+
+        with stream_state['condition']:
+            if not stream_state['subscribers']:
+                stream_state['thread'] = None
+                return
+
+def add_subscriber():
+    """Count a new subscriber and make sure the background sync is running.
+
+    Counting under the same lock the exiting thread checks means a thread
+    that is about to stop either sees this subscriber or is replaced.
+    """
+    with stream_state['condition']:
+        stream_state['subscribers'] += 1
+        if stream_state['thread'] is None:
+            stream_state['thread'] = threading.Thread(target=background_sync_loop, daemon=True)
+            stream_state['thread'].start()
+
+def stream_events(names):
+    """Yield SSE events for the given widgets as new payloads are published"""
+    sent = {}
+
+    def has_updates():
+        return any(stream_state['versions'].get(name, 0) != sent.get(name, 0) for name in names)
+
+    while True:
+        with stream_state['condition']:
+            stream_state['condition'].wait_for(has_updates, timeout=stream_state['keepalive'])
+            events = []
+            for name in names:
+                version = stream_state['versions'].get(name, 0)
+                if version != sent.get(name, 0):
+                    sent[name] = version
+                    events.append(stream_state['payloads'][name][1])
+
+        if not events:
+            yield ": keepalive\n\n"
+            continue
+        yield ''.join(events)
+
+def remove_subscriber():
+    with stream_state['condition']:
+        stream_state['subscribers'] -= 1
+
+# Columns and chunking for /export/transactions
+EXPORT_COLUMNS = ['id', 'parent_id', 'date', 'amount', 'amount_milliunits', 'account_id', 'account_name',
+                  'payee_name', 'category_id', 'category_name', 'memo', 'cleared', 'approved']
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet'
+}
+EXPORT_CHUNK_SIZE = 1000  # Rows serialized per chunk, bounding memory per response
+
+def export_entries(tx, category_names):
+    """(transaction, subtransaction, category id, category name) to export, one per split portion"""
+    subtransactions = [sub for sub in tx.subtransactions or [] if not sub.deleted]
+    if not subtransactions:
+        return [(tx, None, tx.category_id, tx.category_name)]
+    return [(tx, sub, sub.category_id, category_names.get(sub.category_id)) for sub in subtransactions]
+
+def export_chunks(entries):
+    """Yield lists of export rows, EXPORT_CHUNK_SIZE entries at a time"""
+    for start in range(0, len(entries), EXPORT_CHUNK_SIZE):
+        yield [{
+            'id': sub.id if sub else tx.id,
+            'parent_id': tx.id if sub else None,
+            'date': tx.date,
+            'amount': (sub or tx).amount / 1000,  # Convert from milliunits
+            'amount_milliunits': (sub or tx).amount,
+            'account_id': tx.account_id,
+            'account_name': tx.account_name,
+            'payee_name': tx.payee_name,
+            'category_id': category_id,
+            'category_name': category_name,
+            'memo': (sub or tx).memo,
+            'cleared': tx.cleared,
+            'approved': tx.approved
+        } for tx, sub, category_id, category_name in entries[start:start + EXPORT_CHUNK_SIZE]]
+
+def export_ndjson(chunks):
+    for rows in chunks:
+        yield ''.join(json.dumps(row) + '\n' for row in rows)
+
+def export_csv(chunks):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+class _ChunkSink:
+    """Write-only file object that collects bytes for a streaming response"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def export_arrow(chunks, file_format):
+    """Stream chunks as Arrow IPC record batches or Parquet row groups"""
+    # Optional dependency, only imported when Arrow or Parquet is requested
+    import pyarrow as pa
+
+    fields = [
+        ('id', pa.string()), ('parent_id', pa.string()), ('date', pa.date32()), ('amount', pa.float64()),
+        ('amount_milliunits', pa.int64()), ('account_id', pa.string()),
+        ('account_name', pa.string()), ('payee_name', pa.string()),
+        ('category_id', pa.string()), ('category_name', pa.string()),
+        ('memo', pa.string()), ('cleared', pa.string()), ('approved', pa.bool_())
+    ]
+    schema = pa.schema(fields)
+    # Dates arrive as YYYY-MM-DD strings and are cast to date32
+    row_schema = pa.schema([(name, pa.string() if name == 'date' else type_) for name, type_ in fields])
+
+    sink = _ChunkSink()
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    for rows in chunks:
+        writer.write_table(pa.Table.from_pylist(rows, schema=row_schema).cast(schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
 @app.route('/api/spending')
 def api_spending():
     """JSON API endpoint"""
@@ -561,13 +1511,7 @@ def glance_data():
         return jsonify({'error': error}), 500
     
     # Format data for Glance template
-    response = {
-        'categories': data,
-        'updated': datetime.now().strftime('%I:%M %p'),
-        'total_categories': len(data)
-    }
-    
-    return jsonify(response)
+    return jsonify(glance_payload('spending', data))
 
 @app.route('/spending-trends')
 def spending_trends():
@@ -578,13 +1522,7 @@ def spending_trends():
         return jsonify({'error': error}), 500
     
     # Format data for Glance template
-    response = {
-        'categories': data,
-        'updated': datetime.now().strftime('%I:%M %p'),
-        'total_categories': len(data)
-    }
-    
-    return jsonify(response)
+    return jsonify(glance_payload('spending', data))
 
 @app.route('/api/monthly-goals')
 def api_monthly_goals():
@@ -603,13 +1541,7 @@ def monthly_goals_glance():
         return jsonify({'error': error}), 500
     
     # Format data for Glance template
-    response = {
-        'categories': data,
-        'updated': datetime.now().strftime('%I:%M %p'),
-        'total_categories': len(data)
-    }
-    
-    return jsonify(response)
+    return jsonify(glance_payload('monthly_goals', data))
 
 @app.route('/api/savings-rate')
 def api_savings_rate():
@@ -628,12 +1560,7 @@ def savings_rate_glance():
         return jsonify({'error': error}), 500
     
     # Format data for Glance template
-    response = {
-        'savings_data': data,
-        'updated': datetime.now().strftime('%I:%M %p')
-    }
-    
-    return jsonify(response)
+    return jsonify(glance_payload('savings_rate', data))
 
 @app.route('/api/net-worth')
 def api_net_worth():
@@ -651,14 +1578,181 @@ def net_worth_glance():
     if error:
         return jsonify({'error': error}), 500
     
+    # Format data for Glance template
+    return jsonify(glance_payload('net_worth', data))
+
+def parse_top_payees_args():
+    """Read days, limit and sort query parameters, returning (args, error)"""
+    try:
+        days = int(request.args['days']) if 'days' in request.args else None
+        limit = int(request.args['limit']) if 'limit' in request.args else None
+    except ValueError:
+        return None, 'days and limit must be whole numbers'
+    if days is not None and not 1 <= days <= 3660:
+        return None, 'days must be between 1 and 3660'
+    if limit is not None and not 1 <= limit <= 100:
+        return None, 'limit must be between 1 and 100'
+
+    sort = request.args.get('sort', 'spend')
+    if sort not in ('spend', 'visits'):
+        return None, 'sort must be spend or visits'
+    return {'days': days, 'limit': limit, 'sort': sort}, None
+
+@app.route('/api/top-payees')
+def api_top_payees():
+    """JSON API endpoint for top payees"""
+    args, error = parse_top_payees_args()
+    if error:
+        return jsonify({'error': error}), 400
+
+    data, error = get_top_payees_data(**args)
+    if error:
+        return jsonify({'error': error}), 500
+    return jsonify(data)
+
+@app.route('/top-payees')
+def top_payees_glance():
+    """Glance endpoint for top payees widget"""
+    args, error = parse_top_payees_args()
+    if error:
+        return jsonify({'error': error}), 400
+
+    data, error = get_top_payees_data(**args)
+
+    if error:
+        return jsonify({'error': error}), 500
+
+    # Format data for Glance template
+    return jsonify(glance_payload('top_payees', data))
+
+@app.route('/api/forecast', methods=['GET', 'POST'])
+def api_forecast():
+    """JSON API endpoint for projections, with optional what-if scenarios in a POST body"""
+    raw_scenarios = []
+    if request.method == 'POST':
+        body = request.get_json(silent=True)
+        if body is None:
+            body = {}
+        if not isinstance(body, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+        raw_scenarios = body.get('scenarios', [])
+
+    scenarios, error = parse_scenarios(raw_scenarios)
+    if error:
+        return jsonify({'error': error}), 400
+
+    data, error = get_forecast_data(scenarios)
+    if error:
+        return jsonify({'error': error}), 500
+    return jsonify(data)
+
+@app.route('/forecast')
+def forecast_glance():
+    """Glance endpoint for baseline month-end and 12-month projections"""
+    scenarios, _ = parse_scenarios([])
+    data, error = get_forecast_data(scenarios)
+
+    if error:
+        return jsonify({'error': error}), 500
+
     # Format data for Glance template
     response = {
-        'net_worth_data': data,
+        'forecast_data': {
+            'month_end': data['month_end'],
+            'twelve_months': data['scenarios'][0]['twelve_months']
+        },
         'updated': datetime.now().strftime('%I:%M %p')
     }
-    
+
     return jsonify(response)
 
+@app.route('/stream')
+def stream():
+    """Server-Sent Events stream of Glance widget payloads, pushed when data changes"""
+    names = request.args.get('widgets')
+    names = [name.strip() for name in names.split(',')] if names else list(WIDGETS)
+    unknown = [name for name in names if name not in WIDGETS]
+    if unknown:
+        return jsonify({'error': f"Unknown widgets: {', '.join(unknown)}"}), 400
+
+    # Make sure every requested widget has a payload to send on connect
+    for name in names:
+        data, error = get_widget_data(name)
+        if error:
+            publish_widget(name, None, error)
+
+    add_subscriber()
+
+    response = Response(stream_events(names), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Don't let reverse proxies buffer the stream
+    })
+    # Runs when the client disconnects, even if the stream never started
+    response.call_on_close(remove_subscriber)
+    return response
+
+@app.route('/export/transactions')
+def export_transactions():
+    """Stream transactions from the local store as NDJSON, CSV, Arrow IPC or Parquet"""
+    file_format = request.args.get('format', 'ndjson')
+    if file_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"Unknown format, use one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+    if file_format in ('arrow', 'parquet') and importlib.util.find_spec('pyarrow') is None:
+        return jsonify({'error': 'Arrow and Parquet export require pyarrow (pip install -r requirements-analytics.txt)'}), 400
+
+    # Optional filters: inclusive YYYY-MM-DD dates, comma-separated account and category names or ids
+    try:
+        start, end = (
+            date.fromisoformat(value).isoformat() if value else None
+            for value in (request.args.get('start'), request.args.get('end'))
+        )
+    except ValueError:
+        return jsonify({'error': 'start and end must be dates in YYYY-MM-DD format'}), 400
+
+    accounts = request.args.get('account')
+    accounts = {acc.strip() for acc in accounts.split(',')} if accounts else None
+    categories = request.args.get('category')
+    categories = {cat.strip() for cat in categories.split(',')} if categories else None
+
+    try:
+        error = sync_budget(wait=False)
+    except Exception as e:
+        error = str(e)
+    if error and not store['synced_at']:
+        return jsonify({'error': error}), 500
+
+    # Snapshot matching rows; serialization happens chunk by chunk outside the lock.
+    # Split transactions are exported as one row per subtransaction, with parent_id set.
+    with store_lock:
+        category_names = {
+            category.id: category.name
+            for group in store['category_groups'] for category in group.categories
+        }
+        entries = [
+            entry
+            for tx in store['transactions'].values()
+            if (not start or tx.date >= start)
+            and (not end or tx.date <= end)
+            and (accounts is None or tx.account_id in accounts or tx.account_name in accounts)
+            for entry in export_entries(tx, category_names)
+            if categories is None or entry[2] in categories or entry[3] in categories
+        ]
+    entries.sort(key=lambda entry: (entry[0].date, entry[0].id, entry[1].id if entry[1] else ''))
+
+    chunks = export_chunks(entries)
+    if file_format == 'ndjson':
+        body = export_ndjson(chunks)
+    elif file_format == 'csv':
+        body = export_csv(chunks)
+    else:
+        body = export_arrow(chunks, file_format)
+
+    extension = 'arrows' if file_format == 'arrow' else file_format
+    return Response(body, mimetype=EXPORT_FORMATS[file_format], headers={
+        'Content-Disposition': f'attachment; filename=transactions.{extension}'
+    })
+
 @app.route('/health')
 def health():
     """Health check endpoint"""
@@ -666,6 +1760,7 @@ def health():
     monthly_cache_age = time.time() - monthly_cache['timestamp'] if monthly_cache['data'] else 0
     savings_cache_age = time.time() - savings_cache['timestamp'] if savings_cache['data'] else 0
     net_worth_cache_age = time.time() - net_worth_cache['timestamp'] if net_worth_cache['data'] else 0
+    payees_cache_age = time.time() - payees_cache['timestamp'] if payees_cache['data'] else 0
     return jsonify({
         'status': 'healthy', 
         'timestamp': datetime.now().isoformat(),
@@ -684,20 +1779,35 @@ def health():
         'net_worth_cache': {
             'age_seconds': net_worth_cache_age,
             'valid': net_worth_cache_age < net_worth_cache['ttl'] if net_worth_cache['data'] else False
+        },
+        'top_payees_cache': {
+            'age_seconds': payees_cache_age,
+            'valid': payees_cache_age < payees_cache['ttl'] if payees_cache['data'] else False
+        },
+        'sync': {
+            'age_seconds': time.time() - store['synced_at'] if store['synced_at'] else 0,
+            'transactions': len(store['transactions']),
+            'server_knowledge': store['server_knowledge']
+        },
+        'upstream': {
+            'circuit': upstream['state'],
+            'failures': upstream['failures'],
+            'last_error': upstream['error']
+        },
+        'stream': {
+            'subscribers': stream_state['subscribers'],
+            'background_sync': stream_state['thread'] is not None
         }
     })
 
 @app.route('/cache/clear')
 def clear_cache():
     """Clear all caches"""
-    cache['data'] = None
-    cache['timestamp'] = 0
-    monthly_cache['data'] = None
-    monthly_cache['timestamp'] = 0
-    savings_cache['data'] = None
-    savings_cache['timestamp'] = 0
-    net_worth_cache['data'] = None
-    net_worth_cache['timestamp'] = 0
+    with store_lock:
+        for widget in WIDGETS.values():
+            clear_widget_cache(widget['cache'])
+        reset_store()
+        reset_circuit()
     return jsonify({'message': 'All caches cleared', 'timestamp': datetime.now().isoformat()})
 
 @app.route('/debug/category-groups')
@@ -712,7 +1822,7 @@ def debug_category_groups():
             return jsonify({'error': 'API token not found'}), 500
             
         # Initialize YNAB client
-        ynab = YNAB(api_token)
+        ynab = ynab_client(api_token)
         
         # Get budget
         if budget_id:
@@ -752,8 +1862,8 @@ def debug_category_groups():
 def debug_monthly_goals_order():
     """Debug endpoint to show the exact order of monthly goals data"""
     # Clear cache to get fresh data
-    monthly_cache['data'] = None
-    monthly_cache['timestamp'] = 0
+    with store_lock:
+        clear_widget_cache(monthly_cache)
     
     data, error = get_monthly_goals_data()
     
@@ -790,7 +1900,7 @@ def debug_accounts():
             return jsonify({'error': 'API token not found'}), 500
             
         # Initialize YNAB client
-        ynab = YNAB(api_token)
+        ynab = ynab_client(api_token)
         
         # Get budget
         if budget_id:
@@ -828,4 +1938,6 @@ def debug_accounts():
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5001) 
\ No newline at end of file
+    # Debug mode and its reloader re-run startup, so they are opt-in
+    debug = os.getenv('FLASK_DEBUG', '').lower() in ('1', 'true')
+    app.run(debug=debug, host='0.0.0.0', port=5001) 
\ No newline at end of file